@@ -197,8 +197,8 @@ def sync(query, limit, clear, incremental, provider, model):
             if existing:
                 console.print(f"[dim]Skipping {len(existing)} duplicate emails[/dim]")
 
-            emails_with_embeddings = embedder.embed_emails(emails)
-            vector_store.add_emails(emails_with_embeddings)
+            embedded_emails, embeddings = embedder.embed_emails(emails)
+            vector_store.add_emails(embedded_emails, embeddings)
 
             stats = vector_store.get_stats()
             console.print("\n[bold green]✓ Sync complete![/bold green]")
@@ -273,8 +273,8 @@ def sync_mbox(mbox_file, clear, provider, model):
             if existing:
                 console.print(f"[dim]Skipping {len(existing)} duplicate emails[/dim]")
 
-            emails_with_embeddings = embedder.embed_emails(emails)
-            vector_store.add_emails(emails_with_embeddings)
+            embedded_emails, embeddings = embedder.embed_emails(emails)
+            vector_store.add_emails(embedded_emails, embeddings)
 
             stats = vector_store.get_stats()
             console.print("\n[bold green]✓ Import complete![/bold green]")
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -14,16 +14,23 @@ class Settings(BaseSettings):
     ollama_model: str = Field(default="nomic-embed-text", description="Ollama model for embeddings")
     ollama_host: str = Field(default="http://localhost:11434", description="Ollama server URL")
     ollama_instance_count: int = Field(default=1, description="Number of Ollama instances running on sequential ports")
+    ollama_num_parallel: int = Field(default=4, description="Concurrent requests each Ollama instance accepts (OLLAMA_NUM_PARALLEL)")
+    embed_batch_size: int = Field(default=16, description="Number of texts sent per Ollama embed request")
+    embedding_dtype: Literal["float16", "float32"] = Field(default="float16", description="Dtype for embeddings held in memory: 'float16' or 'float32'")
+    embedding_memmap_threshold: int = Field(default=50000, description="Email count above which pending embeddings are kept on disk instead of in RAM")
     
     openai_api_key: Optional[str] = Field(default=None, description="OpenAI API key")
     openai_model: str = Field(default="text-embedding-3-small", description="OpenAI embedding model")
     
     chroma_persist_directory: Path = Field(default=Path("data/chroma"), description="ChromaDB storage directory")
     
+    embedding_cache_path: Path = Field(default=Path("data/embed_cache.sqlite3"), description="Cache of previously generated email embeddings")
+    
     credentials_path: Path = Field(default=Path("credentials/token.json"), description="OAuth token storage path")
     
     batch_size: int = Field(default=100, description="Batch size for processing emails")
     max_results_per_query: int = Field(default=50, description="Maximum search results")
+    query_cache_size: int = Field(default=512, description="Number of query embeddings kept in the search cache")
     
     class Config:
         env_file = ".env"
@@ -1,6 +1,24 @@
 from abc import ABC, abstractmethod
+import tempfile
+from pathlib import Path
 from typing import List, Optional, Tuple
+import numpy as np
+from rich.console import Console
 from ..models import Email
+from ..config import get_settings
+from .embedding_cache import EmbeddingCache
+
+
+console = Console()
+
+
+def normalize_embeddings(matrix: np.ndarray, block_size: int = 4096) -> np.ndarray:
+    """Scale each row to unit length in place, in blocks so disk-backed matrices stay out of RAM"""
+    for start in range(0, len(matrix), block_size):
+        block = np.asarray(matrix[start : start + block_size], dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True) + 1e-12
+        matrix[start : start + block_size] = block
+    return matrix
 
 
 class BaseEmbedder(ABC):
@@ -24,16 +42,87 @@ class BaseEmbedder(ABC):
         pass
     
     @abstractmethod
-    def generate_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
-        """Generate embeddings for multiple texts"""
+    def generate_embeddings_batch(
+        self, texts: List[str], out: Optional[np.ndarray] = None
+    ) -> List[Optional[List[float]]]:
+        """Generate embeddings for multiple texts.
+        When out is given, each embedding is written into its row of out as it arrives"""
         pass
     
     @abstractmethod
-    def embed_emails(self, emails: List[Email]) -> List[Tuple[Email, Optional[List[float]]]]:
-        """Generate embeddings for a list of emails"""
+    def embed_emails(self, emails: List[Email]) -> Tuple[List[Email], np.ndarray]:
+        """Generate embeddings for a list of emails.
+        Returns the embedded emails and a matrix with one row per email"""
         pass
     
     @abstractmethod
     def test_connection(self) -> bool:
         """Test if the embedder is properly configured and can connect"""
-        pass 
\ No newline at end of file
+        pass
+
+    def _allocate_embeddings(self, count: int) -> np.ndarray:
+        """Allocate a (count, dimension) embedding matrix.
+        Large syncs are backed by an anonymous file instead of RAM"""
+        settings = get_settings()
+        shape = (count, self.get_embedding_dimension())
+        if count >= settings.embedding_memmap_threshold:
+            spill_dir = Path(settings.chroma_persist_directory)
+            spill_dir.mkdir(parents=True, exist_ok=True)
+            return np.memmap(
+                tempfile.TemporaryFile(dir=spill_dir),
+                dtype=settings.embedding_dtype,
+                mode="w+",
+                shape=shape,
+            )
+        return np.empty(shape, dtype=settings.embedding_dtype)
+
+    def _embed_texts(
+        self, emails: List[Email], texts: List[str]
+    ) -> Tuple[List[Email], np.ndarray]:
+        """Embed texts straight into a preallocated matrix, reusing any embeddings
+        stored in the embedding cache from earlier runs.
+        Returns the successfully embedded emails and their rows"""
+        settings = get_settings()
+        cache = EmbeddingCache(
+            settings.embedding_cache_path, self.get_model_id(), settings.embedding_dtype
+        )
+        try:
+            hashes = [EmbeddingCache.hash_text(text) for text in texts]
+            cached = cache.lookup(hashes, self.get_embedding_dimension())
+            misses = [i for i, h in enumerate(hashes) if h not in cached]
+            hits = [i for i, h in enumerate(hashes) if h in cached]
+
+            if hits:
+                console.print(f"[dim]Reusing {len(hits)} cached embeddings[/dim]")
+
+            # Misses fill the leading rows so they can be written in one contiguous slice
+            order = misses + hits
+            matrix = self._allocate_embeddings(len(order))
+            succeeded = np.ones(len(order), dtype=bool)
+
+            if misses:
+                fresh = self.generate_embeddings_batch(
+                    [texts[i] for i in misses], out=matrix[: len(misses)]
+                )
+                for row, embedding in enumerate(fresh):
+                    if embedding is None:
+                        succeeded[row] = False
+                cache.store([(hashes[i], embedding) for i, embedding in zip(misses, fresh)])
+
+            for row, i in enumerate(hits, start=len(misses)):
+                matrix[row] = cached[hashes[i]]
+        finally:
+            cache.close()
+
+        keep = np.flatnonzero(succeeded)
+        if len(keep) < len(order):
+            # Compact in place so a disk-backed matrix is never copied into RAM
+            for write, read in enumerate(keep):
+                if write != read:
+                    matrix[write] = matrix[read]
+            matrix = matrix[: len(keep)]
+
+        # Unit vectors let the store rank by inner product instead of full cosine
+        normalize_embeddings(matrix)
+
+        return [emails[order[row]] for row in keep], matrix
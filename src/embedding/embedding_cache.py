@@ -0,0 +1,65 @@
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Persistent content-hash to embedding cache, so unchanged emails are never re-embedded"""
+
+    _LOOKUP_BATCH_SIZE = 500
+
+    def __init__(self, path: Path, model_id: str, dtype: str = "float16"):
+        self.model_id = model_id
+        self.dtype = np.dtype(dtype)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embed_cache ("
+            "hash BLOB NOT NULL, model TEXT NOT NULL, dim INTEGER NOT NULL, vec BLOB NOT NULL, "
+            "dtype TEXT NOT NULL DEFAULT 'float16', PRIMARY KEY (hash, model))"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(embed_cache)")}
+        if "dtype" not in columns:
+            # Caches written before the dtype column existed only ever held float16
+            self.conn.execute(
+                "ALTER TABLE embed_cache ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float16'"
+            )
+
+    @staticmethod
+    def hash_text(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def lookup(self, hashes: List[bytes], dimension: int) -> Dict[bytes, np.ndarray]:
+        """Return cached embeddings for the given hashes, skipping any with the wrong dimension or dtype"""
+        found: Dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), self._LOOKUP_BATCH_SIZE):
+            batch = unique[i : i + self._LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(
+                f"SELECT hash, vec FROM embed_cache WHERE model = ? AND dim = ? AND dtype = ? AND hash IN ({placeholders})",
+                [self.model_id, dimension, self.dtype.name, *batch],
+            )
+            for hash_value, vec in rows:
+                found[hash_value] = np.frombuffer(vec, dtype=self.dtype)
+        return found
+
+    def store(self, items: List[Tuple[bytes, Optional[List[float]]]]):
+        rows = []
+        for hash_value, embedding in items:
+            if embedding is None:
+                continue
+            vec = np.asarray(embedding, dtype=self.dtype)
+            rows.append((hash_value, self.model_id, len(vec), vec.tobytes(), self.dtype.name))
+        if rows:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embed_cache (hash, model, dim, vec, dtype) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
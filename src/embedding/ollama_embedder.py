@@ -1,5 +1,13 @@
-from typing import List, Optional
+import atexit
+import contextlib
+import itertools
+import threading
+import time
+from typing import List, Optional, Tuple
+import httpx
+import numpy as np
 import ollama
+import orjson
 from tqdm import tqdm
 from urllib.parse import urlparse, urlunparse
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -12,6 +20,28 @@ from ..config import get_settings
 
 console = Console()
 
+# Retries for embed requests rejected by a saturated Ollama server (429/5xx)
+MAX_EMBED_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+
+_transport: Optional[httpx.HTTPTransport] = None
+
+
+def _get_http_transport() -> httpx.HTTPTransport:
+    """Get the connection pool shared by every Ollama client"""
+    global _transport
+    if _transport is None:
+        _transport = httpx.HTTPTransport(
+            retries=3,
+            limits=httpx.Limits(
+                max_keepalive_connections=40,
+                max_connections=100,
+                keepalive_expiry=30.0,
+            ),
+        )
+        atexit.register(_transport.close)
+    return _transport
+
 
 class OllamaEmbedder(BaseEmbedder):
     def __init__(self, model_name: Optional[str] = None):
@@ -26,9 +56,16 @@ class OllamaEmbedder(BaseEmbedder):
             port = base_port + i
             new_netloc = f"{base_url.hostname}:{port}"
             url = base_url._replace(netloc=new_netloc)
-            self.clients.append(ollama.Client(host=urlunparse(url)))
+            client = ollama.Client(host=urlunparse(url), transport=_get_http_transport())
+            self.clients.append(client)
 
         self.client = self.clients[0]
+        self.num_parallel = max(1, self.settings.ollama_num_parallel)
+        self._client_slots = {
+            client: threading.Semaphore(self.num_parallel) for client in self.clients
+        }
+        # Pool workers stay bound to one client so their keep-alive connections are reused
+        self._local = threading.local()
         self._embedding_dimension = None
         self._ensure_model_available()
 
@@ -96,60 +133,125 @@ class OllamaEmbedder(BaseEmbedder):
             raise
 
     def generate_embedding(self, text: str, client: Optional[ollama.Client] = None) -> Optional[List[float]]:
-        client = client or self.client
+        embeddings = self._embed_chunk([text], client)
+        return embeddings[0]
+
+    def _post_embed(self, client: ollama.Client, texts: List[str]) -> dict:
+        # Post through the SDK's own httpx client (same headers, auth and redirects)
+        # so the request and response can be handled with orjson
+        response = client._client.post(
+            "/api/embed",
+            content=orjson.dumps({"model": self.model_name, "input": texts}),
+        )
         try:
-            response = client.embed(model=self.model_name, input=text)
-
-            if "embeddings" in response and len(response["embeddings"]) > 0:
-                return response["embeddings"][0]
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise ollama.ResponseError(e.response.text, e.response.status_code) from None
+        return orjson.loads(response.content)
+
+    def _embed_chunk(
+        self,
+        texts: List[str],
+        client: Optional[ollama.Client] = None,
+        out: Optional[np.ndarray] = None,
+    ) -> List[Optional[List[float]]]:
+        client = client or getattr(self._local, "client", None) or self.client
+        slots = self._client_slots.get(client) or contextlib.nullcontext()
+        try:
+            delay = RETRY_BACKOFF_SECONDS
+            for attempt in range(MAX_EMBED_RETRIES + 1):
+                try:
+                    with slots:
+                        response = self._post_embed(client, texts)
+                    break
+                except ollama.ResponseError as e:
+                    retryable = e.status_code == 429 or e.status_code >= 500
+                    if not retryable:
+                        # A 4xx is about the input, so split to find the bad text
+                        console.print(f"[red]Error generating embedding: {e}[/red]")
+                        return self._embed_individually(texts, client, out)
+                    if attempt == MAX_EMBED_RETRIES:
+                        # Splitting would only add load to a server that is already saturated
+                        raise
+                    time.sleep(delay)
+                    delay *= 2
+
+            if "embeddings" in response and len(response["embeddings"]) == len(texts):
+                if out is not None:
+                    out[:] = response["embeddings"]
+                    return list(out)
+                return list(response["embeddings"])
             else:
                 console.print("[red]Unexpected response format from Ollama[/red]")
-                return None
+                return self._embed_individually(texts, client, out)
 
         except Exception as e:
             console.print(f"[red]Error generating embedding: {e}[/red]")
-            return None
+            return [None] * len(texts)
+
+    def _embed_individually(
+        self,
+        texts: List[str],
+        client: ollama.Client,
+        out: Optional[np.ndarray] = None,
+    ) -> List[Optional[List[float]]]:
+        """Retry a failed chunk one text at a time so only the bad texts are lost"""
+        if len(texts) == 1:
+            return [None]
+        console.print(f"[yellow]Retrying {len(texts)} texts individually[/yellow]")
+        return [
+            self._embed_chunk(
+                [text], client, out[j : j + 1] if out is not None else None
+            )[0]
+            for j, text in enumerate(texts)
+        ]
+
+    def _bind_client(self, worker_ids: "itertools.count"):
+        self._local.client = self.clients[next(worker_ids) % len(self.clients)]
 
     def generate_embeddings_batch(
-        self, texts: List[str]
+        self, texts: List[str], out: Optional[np.ndarray] = None
     ) -> List[Optional[List[float]]]:
         embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        batch_size = max(1, self.settings.embed_batch_size)
 
         with tqdm(total=len(texts), desc="Generating embeddings") as pbar:
-            with ThreadPoolExecutor(max_workers=len(self.clients)) as executor:
-                future_to_index = {
-                    executor.submit(
-                        self.generate_embedding,
-                        text,
-                        self.clients[i % len(self.clients)],
-                    ): i
-                    for i, text in enumerate(texts)
-                }
-                for future in as_completed(future_to_index):
-                    idx = future_to_index[future]
-                    embeddings[idx] = future.result()
-                    pbar.update(1)
+            with ThreadPoolExecutor(
+                max_workers=len(self.clients) * self.num_parallel,
+                initializer=self._bind_client,
+                initargs=(itertools.count(),),
+            ) as executor:
+                future_to_chunk = {}
+                for start in range(0, len(texts), batch_size):
+                    chunk = texts[start : start + batch_size]
+                    future = executor.submit(
+                        self._embed_chunk,
+                        chunk,
+                        None,
+                        out[start : start + len(chunk)] if out is not None else None,
+                    )
+                    future_to_chunk[future] = (start, len(chunk))
+
+                for future in as_completed(future_to_chunk):
+                    start, count = future_to_chunk[future]
+                    embeddings[start : start + count] = future.result()
+                    pbar.update(count)
 
         return embeddings
 
-    def embed_emails(
-        self, emails: List[Email]
-    ) -> List[tuple[Email, Optional[List[float]]]]:
+    def embed_emails(self, emails: List[Email]) -> Tuple[List[Email], np.ndarray]:
         console.print(
             f"[bold blue]Generating embeddings for {len(emails)} emails...[/bold blue]"
         )
 
         texts = [email.content_for_embedding for email in emails]
-        embeddings = self.generate_embeddings_batch(texts)
-
-        results = list(zip(emails, embeddings))
+        embedded_emails, matrix = self._embed_texts(emails, texts)
 
-        successful = sum(1 for _, emb in results if emb is not None)
         console.print(
-            f"[green]Successfully generated {successful}/{len(emails)} embeddings[/green]"
+            f"[green]Successfully generated {len(embedded_emails)}/{len(emails)} embeddings[/green]"
         )
 
-        return results
+        return embedded_emails, matrix
 
     def test_connection(self) -> bool:
         try:
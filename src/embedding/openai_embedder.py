@@ -1,4 +1,5 @@
 from typing import List, Optional, Tuple
+import numpy as np
 import openai
 from tqdm import tqdm
 from rich.console import Console
@@ -53,7 +54,7 @@ class OpenAIEmbedder(BaseEmbedder):
             console.print(f"[red]Error generating embedding: {e}[/red]")
             return None
     
-    def generate_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+    def generate_embeddings_batch(self, texts: List[str], out: Optional[np.ndarray] = None) -> List[Optional[List[float]]]:
         embeddings = []
         batch_size = 100
         
@@ -67,8 +68,12 @@ class OpenAIEmbedder(BaseEmbedder):
                         encoding_format="float"
                     )
                     
-                    for data in response.data:
-                        embeddings.append(data.embedding)
+                    for j, data in enumerate(response.data):
+                        if out is not None:
+                            out[i + j] = data.embedding
+                            embeddings.append(out[i + j])
+                        else:
+                            embeddings.append(data.embedding)
                     
                 except Exception as e:
                     console.print(f"[red]Error in batch {i//batch_size}: {e}[/red]")
@@ -78,18 +83,15 @@ class OpenAIEmbedder(BaseEmbedder):
         
         return embeddings
     
-    def embed_emails(self, emails: List[Email]) -> List[Tuple[Email, Optional[List[float]]]]:
+    def embed_emails(self, emails: List[Email]) -> Tuple[List[Email], np.ndarray]:
         console.print(f"[bold blue]Generating embeddings for {len(emails)} emails using OpenAI {self.model_name}...[/bold blue]")
         
         texts = [email.content_for_embedding for email in emails]
-        embeddings = self.generate_embeddings_batch(texts)
+        embedded_emails, matrix = self._embed_texts(emails, texts)
         
-        results = list(zip(emails, embeddings))
+        console.print(f"[green]Successfully generated {len(embedded_emails)}/{len(emails)} embeddings[/green]")
         
-        successful = sum(1 for _, emb in results if emb is not None)
-        console.print(f"[green]Successfully generated {successful}/{len(emails)} embeddings[/green]")
-        
-        return results
+        return embedded_emails, matrix
     
     def test_connection(self) -> bool:
         try:
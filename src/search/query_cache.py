@@ -0,0 +1,66 @@
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from rich.console import Console
+
+
+console = Console()
+
+
+class QueryEmbeddingCache:
+    """LRU cache of query embeddings, persisted so repeated searches skip the embedder"""
+
+    def __init__(self, path: Path, maxsize: int = 512):
+        self.path = path
+        self.keys_path = path.with_suffix(".json")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._load()
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _load(self):
+        if not self.path.exists() or not self.keys_path.exists():
+            return
+        try:
+            matrix = np.load(self.path)
+            with open(self.keys_path, "r", encoding="utf-8") as f:
+                keys = json.load(f)
+            if len(keys) != len(matrix):
+                return
+            for key, vector in zip(keys[-self.maxsize :], matrix[-self.maxsize :]):
+                self._entries[key] = vector
+        except Exception as e:
+            console.print(f"[yellow]Ignoring unreadable query cache: {e}[/yellow]")
+            self._entries.clear()
+
+    def get(self, query: str) -> Optional[List[float]]:
+        key = self._normalize(query)
+        vector = self._entries.get(key)
+        if vector is None:
+            return None
+        self._entries.move_to_end(key)
+        return vector.tolist()
+
+    def put(self, query: str, embedding: List[float]):
+        key = self._normalize(query)
+        self._entries[key] = np.asarray(embedding, dtype=np.float32)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        if not self._entries:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            np.save(self.path, np.stack(list(self._entries.values())))
+            with open(self.keys_path, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.keys()), f)
+        except Exception as e:
+            console.print(f"[red]Error saving query cache: {e}[/red]")
@@ -1,13 +1,16 @@
 import json
 from typing import List
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import numpy as np
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 
 from ..models import Email, SearchResult
 from ..embedding.ollama_embedder import OllamaEmbedder
+from ..embedding.base_embedder import normalize_embeddings
 from .vector_store import EmailVectorStore
+from .query_cache import QueryEmbeddingCache
 from ..config import get_settings
 
 
@@ -19,56 +22,53 @@ class EmailSearcher:
         self.embedder = embedder
         self.vector_store = vector_store
         self.settings = get_settings()
+        self.query_cache = QueryEmbeddingCache(
+            vector_store.get_query_cache_path(), self.settings.query_cache_size
+        )
 
     def search(self, query: str, n_results: int = 10) -> List[SearchResult]:
         console.print(f"[bold blue]Searching for: '{query}'[/bold blue]")
 
-        query_embedding = self.embedder.generate_embedding(query)
+        query_embedding = self.query_cache.get(query)
 
         if query_embedding is None:
-            console.print("[red]Failed to generate query embedding[/red]")
-            return []
-
-        total_count = self.vector_store.collection.count()
-        fetch_count = min(n_results * 2, total_count)
-        accumulated = []
-
-        while True:
-            search_results = self.vector_store.search(query_embedding, fetch_count)
-
-            if not search_results:
-                break
+            query_embedding = self.embedder.generate_embedding(query)
 
-            accumulated.extend(search_results)
+            if query_embedding is None:
+                console.print("[red]Failed to generate query embedding[/red]")
+                return []
 
-            dedup = {}
-            for email_id, distance, metadata in accumulated:
-                message_id = metadata.get("message_id", email_id)
-                if message_id not in dedup or distance < dedup[message_id][1]:
-                    dedup[message_id] = (email_id, distance, metadata)
+            query_embedding = normalize_embeddings(
+                np.asarray([query_embedding], dtype=np.float32)
+            )[0].tolist()
+            self.query_cache.put(query, query_embedding)
+            self.query_cache.save()
 
-            if len(dedup) >= n_results or fetch_count >= total_count:
-                break
+        sorted_results = self.vector_store.search_dedup(query_embedding, n_results)
 
-            fetch_count = min(fetch_count * 2, total_count)
-
-        if not accumulated:
+        if not sorted_results:
             console.print("[yellow]No results found[/yellow]")
             return []
 
-        dedup = {}
-        for email_id, distance, metadata in accumulated:
-            message_id = metadata.get("message_id", email_id)
-            if message_id not in dedup or distance < dedup[message_id][1]:
-                dedup[message_id] = (email_id, distance, metadata)
-
-        sorted_results = sorted(dedup.values(), key=lambda x: x[1])[:n_results]
-
         results = []
         for email_id, distance, metadata in sorted_results:
             email_data = self.vector_store.get_email_by_id(email_id)
 
             if email_data:
+                # Naive dates and emails indexed before date_ts/labels_pipe existed use the slower formats
+                if "date_ts" in metadata and "date_utcoffset" in metadata:
+                    date = datetime.fromtimestamp(
+                        metadata["date_ts"],
+                        tz=timezone(timedelta(seconds=metadata["date_utcoffset"])),
+                    )
+                else:
+                    date = datetime.fromisoformat(metadata["date"])
+                if "labels_pipe" in metadata:
+                    labels_pipe = metadata["labels_pipe"]
+                    labels = labels_pipe.split("|") if labels_pipe else []
+                else:
+                    labels = json.loads(metadata.get("labels", "[]"))
+
                 email = Email(
                     id=email_id,
                     message_id=metadata.get("message_id", email_id),
@@ -76,13 +76,14 @@ class EmailSearcher:
                     subject=metadata["subject"],
                     sender=metadata["sender"],
                     recipients=[],
-                    date=datetime.fromisoformat(metadata["date"]),
+                    date=date,
                     body=email_data["document"],
-                    labels=json.loads(metadata.get("labels", "[]")),
+                    labels=labels,
                     snippet=metadata["snippet"],
                     attachments=[],
                 )
 
+                # Chroma reports both cosine and inner-product distance as 1 - similarity
                 score = 1.0 - distance
 
                 results.append(
@@ -1,7 +1,9 @@
 import json
-from typing import List, Optional, Tuple
+import math
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
+import numpy as np
 from rich.console import Console
 
 from ..models import Email
@@ -12,6 +14,12 @@ from .chroma_client import get_chroma_client
 
 console = Console()
 
+# How many extra hits to fetch so enough remain after collapsing duplicate messages
+DEDUP_OVERFETCH = 1.5
+# Size of the single follow-up fetch when the first one was eaten up by duplicates.
+# Searches stop there, so fewer results come back if the top n * 4 hits hold under n messages
+DEDUP_FOLLOWUP = 4
+
 
 class EmailVectorStore:
     def __init__(self, embedder: BaseEmbedder):
@@ -35,7 +43,8 @@ class EmailVectorStore:
             self.collection = self.client.create_collection(
                 name=self.collection_name,
                 metadata={
-                    "hnsw:space": "cosine",
+                    # Embeddings are unit-normalized, so inner product equals cosine
+                    "hnsw:space": "ip",
                     "model_id": self.model_id,
                     "embedding_dimension": self.embedder.get_embedding_dimension(),
                 },
@@ -51,6 +60,11 @@ class EmailVectorStore:
         metadata_dir.mkdir(exist_ok=True)
         return metadata_dir / f"{self.collection_name}_sync.json"
 
+    def get_query_cache_path(self) -> Path:
+        """Get path to the cached query embeddings for this collection"""
+        metadata_dir = Path(self.settings.chroma_persist_directory) / "metadata"
+        return metadata_dir / f"{self.collection_name}_queries.npy"
+
     def update_last_sync_date(self):
         """Update the last sync date in a separate metadata file"""
         try:
@@ -80,49 +94,39 @@ class EmailVectorStore:
             console.print(f"[red]Error getting last sync date: {e}[/red]")
             return None
 
-    def add_emails(
-        self, emails_with_embeddings: List[Tuple[Email, Optional[List[float]]]]
-    ):
+    def add_emails(self, emails: List[Email], embeddings: np.ndarray):
         documents = []
-        embeddings = []
         metadatas = []
         ids = []
 
-        skipped_no_embedding = 0
-        for email, embedding in emails_with_embeddings:
-            if embedding is None:
-                skipped_no_embedding += 1
-                continue
-
+        for email in emails:
             documents.append(email.content_for_embedding)
-            embeddings.append(embedding)
             ids.append(email.id)
 
             metadata = {
                 "subject": email.subject,
                 "sender": email.sender,
                 "date": email.date.isoformat(),
+                "date_ts": int(email.date.timestamp()),
                 "message_id": email.message_id,
                 "thread_id": email.thread_id,
                 "snippet": email.snippet[:500],
                 "labels": json.dumps(email.labels),
                 "has_attachments": len(email.attachments) > 0,
             }
+            # Labels containing the separator would be split apart, so they stay JSON-only
+            if not any("|" in label for label in email.labels):
+                metadata["labels_pipe"] = "|".join(email.labels)
+            utc_offset = email.date.utcoffset()
+            if utc_offset is not None:
+                metadata["date_utcoffset"] = int(utc_offset.total_seconds())
             metadatas.append(metadata)
 
-        if skipped_no_embedding > 0:
-            console.print(
-                f"[yellow]Skipped {skipped_no_embedding} emails without embeddings[/yellow]"
-            )
-
         if documents:
             try:
                 # Batch check for existing emails to avoid loading all IDs for large collections
                 batch_size = 100
-                new_documents = []
-                new_embeddings = []
-                new_metadatas = []
-                new_ids = []
+                new_indices = []
                 duplicates = 0
 
                 for i in range(0, len(ids), batch_size):
@@ -138,28 +142,24 @@ class EmailVectorStore:
 
                     # Add only non-existing emails from this batch
                     for j, email_id in enumerate(batch_ids):
-                        idx = i + j
                         if email_id not in existing_set:
-                            new_documents.append(documents[idx])
-                            new_embeddings.append(embeddings[idx])
-                            new_metadatas.append(metadatas[idx])
-                            new_ids.append(ids[idx])
+                            new_indices.append(i + j)
                         else:
                             duplicates += 1
 
-                if new_documents:
+                if new_indices:
                     # Add in batches to avoid potential memory issues
-                    for i in range(0, len(new_ids), batch_size):
-                        end_idx = min(i + batch_size, len(new_ids))
+                    for i in range(0, len(new_indices), batch_size):
+                        batch = new_indices[i : i + batch_size]
                         self.collection.add(
-                            documents=new_documents[i:end_idx],
-                            embeddings=new_embeddings[i:end_idx],
-                            metadatas=new_metadatas[i:end_idx],
-                            ids=new_ids[i:end_idx],
+                            documents=[documents[idx] for idx in batch],
+                            embeddings=embeddings[batch].astype(np.float32),
+                            metadatas=[metadatas[idx] for idx in batch],
+                            ids=[ids[idx] for idx in batch],
                         )
 
                     console.print(
-                        f"[green]✓ Added {len(new_documents)} new emails to collection '{self.collection_name}'[/green]"
+                        f"[green]✓ Added {len(new_indices)} new emails to collection '{self.collection_name}'[/green]"
                     )
                     if duplicates > 0:
                         console.print(
@@ -177,27 +177,54 @@ class EmailVectorStore:
                 console.print(f"[red]Error adding emails to vector store: {e}[/red]")
                 raise
 
-    def search(
-        self, query_embedding: List[float], n_results: int = 10
+    def search_dedup(
+        self,
+        query_embedding: List[float],
+        n_results: int = 10,
+        dedup_field: str = "message_id",
     ) -> List[Tuple[str, float, dict]]:
+        """Return the closest emails, keeping only the best match per dedup_field value.
+        Overfetches once, then re-queries at most once more if duplicates left too few results.
+        Returns fewer than n_results when the top n_results * DEDUP_FOLLOWUP hits cover fewer messages"""
         try:
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=min(n_results, self.collection.count()),
-            )
-
-            if not results["ids"] or not results["ids"][0]:
+            total_count = self.collection.count()
+            if total_count == 0 or n_results <= 0:
                 return []
 
-            search_results = []
-            for i in range(len(results["ids"][0])):
-                email_id = results["ids"][0][i]
-                distance = results["distances"][0][i]
-                metadata = results["metadatas"][0][i]
-
-                search_results.append((email_id, distance, metadata))
-
-            return search_results
+            fetch = min(math.ceil(n_results * DEDUP_OVERFETCH), total_count)
+            while True:
+                results = self.collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=fetch,
+                    include=["metadatas", "distances"],
+                )
+
+                if not results["ids"] or not results["ids"][0]:
+                    return []
+
+                ids = results["ids"][0]
+                distances = results["distances"][0]
+                metadatas = results["metadatas"][0]
+
+                best: Dict[str, int] = {}
+                for i, (email_id, metadata) in enumerate(zip(ids, metadatas)):
+                    key = metadata.get(dedup_field, email_id)
+                    current = best.get(key)
+                    if current is None or distances[i] < distances[current]:
+                        best[key] = i
+
+                followup = min(n_results * DEDUP_FOLLOWUP, total_count)
+                if len(best) >= n_results or fetch >= followup:
+                    break
+                fetch = followup
+
+            unique = np.fromiter(best.values(), dtype=np.intp, count=len(best))
+            unique_distances = np.asarray(distances, dtype=np.float64)[unique]
+            k = min(n_results, len(unique))
+            top = np.argpartition(unique_distances, k - 1)[:k]
+            top = unique[top[np.argsort(unique_distances[top])]]
+
+            return [(ids[i], distances[i], metadatas[i]) for i in top]
 
         except Exception as e:
             console.print(f"[red]Error searching vector store: {e}[/red]")
@@ -1,42 +1,88 @@
 import mailbox
 import email
+import multiprocessing
 from email.utils import parsedate_to_datetime, getaddresses
 from email.header import decode_header
+from email.parser import BytesParser
+from email.policy import compat32
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Dict, Any, Tuple
 from rich.console import Console
 from tqdm import tqdm
 
 from ..models import Email
 
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
 console = Console()
 
 import mmap, re, mailbox, os
 from tqdm import tqdm
 
+_RE_SCRIPT = re.compile(rb"<script.*?</script>", re.DOTALL | re.IGNORECASE)
+_RE_STYLE = re.compile(rb"<style.*?</style>", re.DOTALL | re.IGNORECASE)
+_RE_TAG = re.compile(rb"<[^>]+>")
+_RE_WS = re.compile(r"\s+")
+
 class FastMbox(mailbox.mbox):
-    _pat = re.compile(br'\nFrom ')
+    _needle = b'\nFrom '
+    _progress_every = 1024
+
     def _generate_toc(self):
         size = os.path.getsize(self._path)
         with open(self._path, 'rb') as f:
             mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
             bar = tqdm(total=size, unit='B', unit_scale=True, desc='Indexing mbox')
             starts, stops, last = [0], [], 0
-            for m in self._pat.finditer(mm):
-                pos = m.start() + 1
+            find = mm.find
+            pos = find(self._needle)
+            while pos >= 0:
+                pos += 1
                 stops.append(pos)
                 starts.append(pos)
-                if bar: bar.update(pos - last)
-                last = pos
+                if len(stops) % self._progress_every == 0:
+                    bar.update(pos - last)
+                    last = pos
+                pos = find(self._needle, pos)
             stops.append(len(mm))
-            if bar:
-                bar.update(len(mm) - last)
-                bar.close()
+            bar.update(len(mm) - last)
+            bar.close()
             self._toc = dict(enumerate(zip(starts, stops)))
             self._next_key = len(self._toc)
             self._file_length = len(mm)
 
+    def get_message_ranges(self) -> List[Tuple[int, int]]:
+        """Return the (start, stop) byte offsets of every message in file order"""
+        self._lookup()
+        return [self._toc[key] for key in sorted(self._toc)]
+
+
+# Messages handed to each worker process; large enough to amortize pickling
+PARSE_CHUNK_SIZE = 64
+MAX_PARSE_WORKERS = 16
+
+# compat32 keeps headers as raw strings; policy.default is ~9x slower on mbox imports
+_parser = BytesParser(policy=compat32)
+
 
+def _parse_message_ranges(
+    mbox_path: str, ranges: List[Tuple[int, int]], first_index: int
+) -> List[Email]:
+    """Parse a slice of an mbox file. Runs inside a worker process."""
+    syncer = MboxSyncer(mbox_path)
+    emails: List[Email] = []
+    with open(mbox_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset, (start, stop) in enumerate(ranges):
+                msg = _parser.parsebytes(mm[start:stop])
+                email_obj = syncer._parse_email(msg, first_index + offset)
+                if email_obj:
+                    emails.append(email_obj)
+    return emails
 
 
 class MboxSyncer:
@@ -45,18 +91,40 @@ class MboxSyncer:
     def __init__(self, mbox_path: str):
         self.mbox_path = mbox_path
 
-    def _strip_html(self, html: str) -> str:
-        import re
-        html = re.sub(r"<script.*?</script>", "", html, flags=re.DOTALL)
-        html = re.sub(r"<style.*?</style>", "", html, flags=re.DOTALL)
-        html = re.sub(r"<[^>]+>", " ", html)
-        html = re.sub(r"\s+", " ", html)
-        return html.strip()
+    def _decode_text(self, payload: bytes, charset: str) -> str:
+        try:
+            return payload.decode(charset, errors="ignore")
+        except LookupError:
+            return payload.decode("utf-8", errors="ignore")
+
+    def _strip_html(self, html: bytes, charset: str = "utf-8") -> str:
+        if HTMLParser is not None:
+            tree = HTMLParser(self._decode_text(html, charset))
+            tree.strip_tags(["script", "style"])
+            root = tree.body or tree.root
+            text = root.text(separator=" ") if root is not None else ""
+            return _RE_WS.sub(" ", text).strip()
+
+        try:
+            ascii_compatible = "<".encode(charset) == b"<"
+        except LookupError:
+            ascii_compatible = True
+        if not ascii_compatible:
+            html = self._decode_text(html, charset).encode("utf-8")
+            charset = "utf-8"
+
+        html = _RE_SCRIPT.sub(b"", html)
+        html = _RE_STYLE.sub(b"", html)
+        html = _RE_TAG.sub(b" ", html)
+        return _RE_WS.sub(" ", self._decode_text(html, charset)).strip()
 
     def _decode_header(self, value: str) -> str:
         """Decode RFC2047 header values to a readable string."""
         if not value:
             return ""
+        # RFC2047 encoded words always start with "=?"; plain headers need no decoding
+        if isinstance(value, str) and "=?" not in value:
+            return value
         decoded = decode_header(value)
         parts = []
         for fragment, charset in decoded:
@@ -70,36 +138,55 @@ class MboxSyncer:
                 parts.append(fragment)
         return "".join(parts)
 
-    def _get_body(self, msg: email.message.Message) -> str:
-        if msg.is_multipart():
-            parts = []
-            for part in msg.walk():
-                if part.get_content_maintype() == "multipart":
-                    continue
-                if part.get_filename():
-                    continue
-                content_type = part.get_content_type()
-                payload = part.get_payload(decode=True)
-                if payload is None:
-                    continue
-                charset = part.get_content_charset() or "utf-8"
-                try:
-                    text = payload.decode(charset, errors="ignore")
-                except LookupError:
-                    text = payload.decode("utf-8", errors="ignore")
-                if content_type == "text/plain":
-                    parts.append(text)
-                elif content_type == "text/html" and not parts:
-                    parts.append(self._strip_html(text))
-            return "\n".join(parts)
-        payload = msg.get_payload(decode=True)
-        if isinstance(payload, bytes):
-            charset = msg.get_content_charset() or "utf-8"
-            try:
-                return payload.decode(charset, errors="ignore")
-            except LookupError:
-                return payload.decode("utf-8", errors="ignore")
-        return str(payload)
+    def _estimate_attachment_size(self, part: email.message.Message) -> int:
+        """Size of an attachment's decoded payload, computed without decoding base64."""
+        payload = part.get_payload()
+        if not isinstance(payload, str):
+            return 0
+        encoding = part.get("Content-Transfer-Encoding", "").strip().lower()
+        if encoding == "base64":
+            data_len = len(payload) - payload.count("\n") - payload.count("\r")
+            data_len -= payload.count(" ") + payload.count("\t")
+            padding = payload.rstrip()[-2:].count("=")
+            return max(0, data_len * 3 // 4 - padding)
+        if encoding in ("", "7bit", "8bit", "binary"):
+            return len(payload)
+        return len(part.get_payload(decode=True) or b"")
+
+    def _walk_once(
+        self, msg: email.message.Message
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """Collect the body text and attachment metadata in a single MIME walk."""
+        if not msg.is_multipart():
+            payload = msg.get_payload(decode=True)
+            if isinstance(payload, bytes):
+                charset = msg.get_content_charset() or "utf-8"
+                return self._decode_text(payload, charset), []
+            return str(payload), []
+
+        parts = []
+        attachments: List[Dict[str, Any]] = []
+        for part in msg.walk():
+            filename = part.get_filename()
+            if filename:
+                attachments.append({
+                    "filename": filename,
+                    "mime_type": part.get_content_type(),
+                    "size": self._estimate_attachment_size(part),
+                })
+                continue
+            content_type = part.get_content_type()
+            if content_type != "text/plain" and (content_type != "text/html" or parts):
+                continue
+            payload = part.get_payload(decode=True)
+            if payload is None:
+                continue
+            charset = part.get_content_charset() or "utf-8"
+            if content_type == "text/plain":
+                parts.append(self._decode_text(payload, charset))
+            else:
+                parts.append(self._strip_html(payload, charset))
+        return "\n".join(parts), attachments
 
     def _parse_email(self, msg: email.message.Message, index: int) -> Optional[Email]:
         try:
@@ -122,20 +209,9 @@ class MboxSyncer:
                     decoded = self._decode_header(header_value)
                     recipients.extend(addr for name, addr in getaddresses([decoded]))
 
-            body = self._get_body(msg)
+            body, attachments = self._walk_once(msg)
             snippet = body[:100].replace("\n", " ").strip()
 
-            attachments: List[Dict[str, Any]] = []
-            if msg.is_multipart():
-                for part in msg.walk():
-                    filename = part.get_filename()
-                    if filename:
-                        attachments.append({
-                            "filename": filename,
-                            "mime_type": part.get_content_type(),
-                            "size": len(part.get_payload(decode=True) or b""),
-                        })
-
             subject_header = msg.get("Subject", "(No Subject)")
             subject = self._decode_header(subject_header) or "(No Subject)"
 
@@ -159,14 +235,43 @@ class MboxSyncer:
     def sync_emails(self) -> List[Email]:
         console.print(f"[bold blue]Loading mbox file {self.mbox_path}...[/bold blue]")
         mbox = FastMbox(self.mbox_path)
-        emails: List[Email] = []
-        total_messages = len(mbox)
-        with tqdm(total=total_messages, desc="Parsing mbox") as pbar:
-            for idx, msg in enumerate(mbox):
-                email_obj = self._parse_email(msg, idx)
-                if email_obj:
-                    emails.append(email_obj)
-                pbar.update(1)
+        ranges = mbox.get_message_ranges()
         mbox.close()
+
+        chunks = [
+            (start, ranges[start : start + PARSE_CHUNK_SIZE])
+            for start in range(0, len(ranges), PARSE_CHUNK_SIZE)
+        ]
+        workers = min(os.cpu_count() or 1, MAX_PARSE_WORKERS, len(chunks))
+        parsed: List[List[Email]] = [[] for _ in chunks]
+
+        with tqdm(total=len(ranges), desc="Parsing mbox") as pbar:
+            if workers <= 1:
+                for n, (start, chunk) in enumerate(chunks):
+                    parsed[n] = _parse_message_ranges(self.mbox_path, chunk, start)
+                    pbar.update(len(chunk))
+            else:
+                # The Chroma client may already be running threads, so never fork this process
+                start_method = (
+                    "forkserver"
+                    if "forkserver" in multiprocessing.get_all_start_methods()
+                    else "spawn"
+                )
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context(start_method),
+                ) as executor:
+                    future_to_chunk = {
+                        executor.submit(
+                            _parse_message_ranges, self.mbox_path, chunk, start
+                        ): n
+                        for n, (start, chunk) in enumerate(chunks)
+                    }
+                    for future in as_completed(future_to_chunk):
+                        n = future_to_chunk[future]
+                        parsed[n] = future.result()
+                        pbar.update(len(chunks[n][1]))
+
+        emails = [email_obj for chunk in parsed for email_obj in chunk]
         console.print(f"[bold green]Loaded {len(emails)} emails from mbox[/bold green]")
         return emails